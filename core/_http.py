@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+DCA Optimizer - Sesión HTTP compartida
+Keep-alive y reintentos para CoinGecko, alternative.me, CoinMetrics y Telegram
+"""
+
+import hashlib
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import _json
+from .config import config
+
+DEFAULT_HEADERS = {
+    "User-Agent": "dca-optimizer",
+    "Accept": "application/json",
+}
+
+_session: Optional[requests.Session] = None
+
+
+class _CappedRetry(Retry):
+    """Retry que respeta Retry-After pero nunca espera más de RETRY_AFTER_MAX"""
+    
+    RETRY_AFTER_MAX = 10
+    
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.RETRY_AFTER_MAX)
+
+
+# Límite del backoff exponencial entre reintentos (segundos)
+BACKOFF_MAX = 5
+
+STATUS_FORCELIST = (429, 500, 502, 503, 504)
+
+TELEGRAM_PREFIX = "https://api.telegram.org/"
+
+
+def create_session() -> requests.Session:
+    """Sesión con pool por host (4 APIs) y reintentos ante 429/5xx"""
+    # GET idempotentes: se reintentan también timeouts y conexiones cortadas
+    retry = _CappedRetry(
+        total=3,
+        backoff_factor=0.3,
+        backoff_max=BACKOFF_MAX,
+        status_forcelist=STATUS_FORCELIST,
+        respect_retry_after_header=True,  # CoinGecko indica la espera en 429
+    )
+    # sendMessage no es idempotente: un read timeout puede llegar con el mensaje
+    # ya entregado, así que solo se reintenta al fallar la conexión o ante 429/5xx
+    telegram_retry = _CappedRetry(
+        total=3,
+        connect=2,
+        read=0,
+        other=0,
+        status=2,
+        backoff_factor=0.3,
+        backoff_max=BACKOFF_MAX,
+        status_forcelist=STATUS_FORCELIST,
+        allowed_methods={"POST"},
+        respect_retry_after_header=True,
+    )
+    
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    # requests elige el prefijo montado más largo
+    session.mount(TELEGRAM_PREFIX, HTTPAdapter(pool_connections=1, pool_maxsize=2,
+                                               max_retries=telegram_retry))
+    return session
+
+
+def shared_session() -> requests.Session:
+    """Sesión única del proceso; se crea en el primer uso"""
+    global _session
+    if _session is None:
+        _session = create_session()
+    return _session
+
+
+# ============================================================================
+# CACHE EN DISCO
+# ============================================================================
+
+def cached_get_json(url: str, params: Optional[dict] = None,
+                    ttl: float = 60, timeout: float = 15):
+    """GET JSON con cache en disco: sin red dentro del TTL, revalida con ETag"""
+    key = hashlib.sha1(f"{url}?{sorted((params or {}).items())}".encode()).hexdigest()
+    path = config.cache_dir / f"http_{key[:16]}.json"
+    
+    try:
+        entry = _json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        entry = None
+    
+    now = time.time()
+    if entry and now - entry["fetched_at"] < ttl:
+        return entry["json"]
+    
+    headers = {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else {}
+    r = shared_session().get(url, params=params, headers=headers, timeout=timeout)
+    if r.status_code == 304 and entry:
+        entry["fetched_at"] = now
+    else:
+        r.raise_for_status()
+        entry = {"fetched_at": now, "etag": r.headers.get("ETag"), "json": _json.loads(r.content)}
+    
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(_json.dumps(entry))
+        tmp.replace(path)
+    except OSError:
+        pass  # El cache en disco es opcional
+    return entry["json"]
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+DCA Optimizer - Serialización JSON
+Usa orjson si está instalado; si no, el módulo json estándar
+"""
+
+try:
+    import orjson
+except ImportError:  # orjson es una dependencia opcional
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps(obj) -> str:
+        # str para que las columnas *_json sigan siendo TEXT en SQLite
+        # OPT_SERIALIZE_NUMPY: los indicadores pueden traer escalares numpy
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+else:
+    from json import dumps, loads
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+DCA Optimizer - Compilación JIT opcional
+Usa numba si está instalado; si no, las funciones corren como Python puro
+"""
+
+try:
+    from numba import njit
+except ImportError:  # numba es una dependencia opcional
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -106,6 +106,9 @@ class Config:
     project_dir: Path = field(
         default_factory=lambda: Path.home() / "dca-optimizer"
     )
+    cache_dir: Path = field(
+        default_factory=lambda: Path.home() / ".cache" / "dca-optimizer"
+    )
     telegram: TelegramConfig = field(default_factory=TelegramConfig)
     buy: BuyConfig = field(default_factory=BuyConfig)
     sell: SellConfig = field(default_factory=SellConfig)
@@ -4,15 +4,17 @@ DCA Optimizer - Capa de Base de Datos
 Repository Pattern para acceso unificado a SQLite
 """
 
-import json
+import atexit
 import sqlite3
 from abc import ABC, abstractmethod
+from collections import namedtuple
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from . import _json
 from .config import config, SignalType, RiskLevel
 
 
@@ -20,7 +22,7 @@ from .config import config, SignalType, RiskLevel
 # DATA MODELS
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MarketData:
     """Datos de mercado compartidos"""
     price: float
@@ -39,7 +41,7 @@ class MarketData:
     fear_greed: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BuySignal:
     """Señal de compra"""
     signal_type: SignalType
@@ -52,7 +54,7 @@ class BuySignal:
     executed: bool = False
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Indicator:
     """Indicador individual para sell"""
     name: str
@@ -63,7 +65,7 @@ class Indicator:
     threshold_critical: float
 
 
-@dataclass
+@dataclass(slots=True)
 class SellSignal:
     """Señal de venta"""
     signal_type: SignalType  # SELL, ALERT, HOLD
@@ -80,20 +82,187 @@ class SellSignal:
     executed: bool = False
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Position:
     """Posición de BTC"""
     total_btc: float
     sold_btc: float
     cost_basis: float
     
-    @property
-    def remaining_btc(self) -> float:
-        return self.total_btc - self.sold_btc
+    # Derivados: se calculan una vez al cargar la posición
+    remaining_btc: float = field(init=False, compare=False)
+    cost_per_btc: float = field(init=False, compare=False)
     
-    @property
-    def cost_per_btc(self) -> float:
-        return self.cost_basis / self.total_btc if self.total_btc > 0 else 0
+    def __post_init__(self):
+        # frozen: se asigna vía object.__setattr__
+        object.__setattr__(self, "remaining_btc", self.total_btc - self.sold_btc)
+        object.__setattr__(
+            self, "cost_per_btc",
+            self.cost_basis / self.total_btc if self.total_btc > 0 else 0
+        )
+
+
+# Filas de lectura livianas (sin dict por fila)
+SIGNAL_COLS = (
+    "id", "timestamp", "signal_type", "multiplier", "suggested_amount", "reasons",
+    "price", "ma7", "ma21", "ma200", "rsi", "pct_change_7d",
+    "notification_sent", "executed", "actual_amount",
+)
+SignalRow = namedtuple("SignalRow", SIGNAL_COLS)
+
+BUY_STATS_COLS = (
+    "turbo_buys", "extra_buys", "normal_dcas", "skips", "total_invested", "total_signals",
+)
+BuyStats = namedtuple("BuyStats", BUY_STATS_COLS)
+
+SELL_SIGNAL_SUMMARY_COLS = (
+    "id", "timestamp", "signal_type", "risk_score", "sell_percentage",
+    "pi_cycle_triggered", "executed",
+)
+SellSignalSummary = namedtuple("SellSignalSummary", SELL_SIGNAL_SUMMARY_COLS)
+
+SELL_SIGNAL_ROW_COLS = (
+    "timestamp", "price", "risk_score", "signal_type",
+    "sell_percentage", "pi_cycle_triggered", "executed",
+)
+SellSignalRow = namedtuple("SellSignalRow", SELL_SIGNAL_ROW_COLS)
+
+SELL_STATS_COLS = (
+    "total_signals", "sell_signals", "executed_sales", "avg_risk_score", "total_sold_usd",
+    "avg_sale_price", "realized_profit",
+)
+SellStats = namedtuple("SellStats", SELL_STATS_COLS)
+
+
+# ============================================================================
+# SQL STATEMENTS
+# ============================================================================
+# Texto SQL estable: sqlite3 cachea el statement preparado por conexión
+
+INSERT_SIGNAL_SQL = """
+    INSERT INTO signals (
+        timestamp, signal_type, multiplier, suggested_amount, reasons,
+        price, ma7, ma21, ma200, rsi, pct_change_7d
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_RECENT_SIGNALS_SQL = f"""
+    SELECT {", ".join(SIGNAL_COLS)} FROM signals ORDER BY timestamp DESC LIMIT ?
+"""
+
+# Agregados de las últimas N señales resueltos por SQLite en una sola fila
+SELECT_BUY_STATS_SQL = """
+    SELECT
+        COALESCE(SUM(signal_type = 'TURBO_BUY'), 0),
+        COALESCE(SUM(signal_type = 'EXTRA_BUY'), 0),
+        COALESCE(SUM(signal_type = 'NORMAL_DCA'), 0),
+        COALESCE(SUM(signal_type = 'SKIP'), 0),
+        TOTAL(CASE WHEN signal_type IN ('TURBO_BUY', 'EXTRA_BUY', 'NORMAL_DCA')
+                   THEN suggested_amount END),
+        COUNT(*)
+    FROM (SELECT signal_type, suggested_amount FROM signals ORDER BY timestamp DESC LIMIT ?)
+"""
+
+MARK_SIGNAL_NOTIFIED_SQL = "UPDATE signals SET notification_sent = 1 WHERE id = ?"
+
+INSERT_PRICE_SQL = """
+    INSERT INTO price_history (timestamp, price, ma7, ma21, rsi)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+INSERT_POSITION_SQL = """
+    INSERT INTO position (id, total_btc, sold_btc, cost_basis, created_at, updated_at)
+    VALUES (1, ?, 0, ?, ?, ?)
+"""
+
+SELECT_POSITION_SQL = "SELECT total_btc, sold_btc, cost_basis FROM position WHERE id = 1"
+
+# Primera ejecución: si otro proceso ya creó la fila, no falla
+INSERT_POSITION_IF_MISSING_SQL = """
+    INSERT OR IGNORE INTO position (id, total_btc, sold_btc, cost_basis, created_at, updated_at)
+    VALUES (1, ?, 0, ?, ?, ?)
+"""
+
+# Indicadores con columna propia (se leen de MarketData) para consultas agregadas
+SELL_INDICATOR_COLS = ("rsi", "mvrv_zscore", "nupl", "mayer_multiple", "fear_greed")
+
+# Nombre de cada columna dentro de indicators_json (para completar filas viejas)
+SELL_INDICATOR_NAMES = {
+    "rsi": "RSI (Daily)",
+    "mvrv_zscore": "MVRV Z-Score",
+    "nupl": "NUPL",
+    "mayer_multiple": "Mayer Multiple",
+    "fear_greed": "Fear & Greed",
+}
+
+# {col}: columna recién agregada; el valor sale del objeto con ese nombre
+BACKFILL_INDICATOR_SQL = """
+    UPDATE sell_signals SET {col} = (
+        SELECT json_extract(i.value, '$.value')
+        FROM json_each(sell_signals.indicators_json) AS i
+        WHERE json_extract(i.value, '$.name') = ?
+    )
+    WHERE json_valid(indicators_json)
+"""
+
+INSERT_SELL_SIGNAL_SQL = f"""
+    INSERT INTO sell_signals (
+        timestamp, price, risk_score, signal_type, sell_percentage,
+        sell_amount_btc, pi_cycle_triggered, indicators_json, reasons_json,
+        {", ".join(SELL_INDICATOR_COLS)}
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, {", ".join(["?"] * len(SELL_INDICATOR_COLS))})
+"""
+
+MARK_SELL_NOTIFIED_SQL = "UPDATE sell_signals SET notification_sent = 1 WHERE id = ?"
+
+MARK_SELL_EXECUTED_SQL = "UPDATE sell_signals SET executed = 1 WHERE id = ?"
+
+INSERT_EXECUTION_SQL = """
+    INSERT INTO sell_executions 
+    (signal_id, timestamp, btc_sold, price_at_sale, usd_received, exchange)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Posición + última señal de venta en un solo statement
+SELECT_POSITION_WITH_LATEST_SQL = f"""
+    SELECT p.total_btc, p.sold_btc, p.cost_basis,
+           {", ".join("s." + c for c in SELL_SIGNAL_SUMMARY_COLS)}
+    FROM position p
+    LEFT JOIN (
+        SELECT {", ".join(SELL_SIGNAL_SUMMARY_COLS)}
+        FROM sell_signals ORDER BY timestamp DESC LIMIT 1
+    ) s ON 1
+    WHERE p.id = 1
+"""
+
+SELECT_RECENT_SELL_SIGNALS_SQL = f"""
+    SELECT {", ".join(SELL_SIGNAL_ROW_COLS)}
+    FROM sell_signals ORDER BY timestamp DESC LIMIT ?
+"""
+
+# Agregado de señales, ventas y beneficio realizado en una sola consulta
+SELECT_SELL_STATS_SQL = """
+    WITH p AS (
+        SELECT CASE WHEN total_btc > 0 THEN cost_basis / total_btc ELSE 0 END AS cpbtc
+        FROM position WHERE id = 1
+    ), e AS (
+        SELECT COUNT(*) AS execs, TOTAL(btc_sold) AS bs, TOTAL(usd_received) AS ur
+        FROM sell_executions
+    ), s AS (
+        SELECT COUNT(*) AS n,
+               COALESCE(SUM(signal_type = 'SELL'), 0) AS sells,
+               COALESCE(AVG(risk_score), 0) AS risk
+        FROM sell_signals
+    )
+    SELECT s.n, s.sells, e.execs, s.risk, e.ur,
+           CASE WHEN e.bs > 0 THEN e.ur / e.bs ELSE 0 END,
+           e.ur - e.bs * COALESCE(p.cpbtc, 0)
+    FROM s CROSS JOIN e LEFT JOIN p ON 1
+"""
+
+UPDATE_POSITION_SOLD_SQL = """
+    UPDATE position SET sold_btc = sold_btc + ?, updated_at = ? WHERE id = 1
+"""
 
 
 # ============================================================================
@@ -103,25 +272,172 @@ class Position:
 class BaseRepository(ABC):
     """Repositorio base con conexión compartida"""
     
+    # Se aplican una sola vez al abrir la conexión
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA mmap_size=268435456",  # 256 MB: lecturas sin copiar al page cache
+        "PRAGMA busy_timeout=5000",
+    )
+    
+    # Filas a partir de las cuales vale la pena generar estadísticas
+    ANALYZE_MIN_ROWS = 1000
+    
+    # Una conexión por archivo, compartida entre repositorios (buy/sell usan la misma DB)
+    _connections: dict[Path, sqlite3.Connection] = {}
+    
+    # Repositorios abiertos sobre cada conexión; close() cierra con el último
+    _refs: dict[Path, int] = {}
+    
+    # Resultados de agregados: (db_path, clave) -> (versión de datos, valor)
+    _memo: dict[tuple, tuple] = {}
+    
+    # (db_path, repositorio) cuyo esquema ya se verificó en este proceso
+    _initialized: set[tuple[Path, type]] = set()
+    
+    # Repositorios con escrituras pendientes; close_all los vacía antes de cerrar
+    _buffered: set["BaseRepository"] = set()
+    
     def __init__(self, db_path: Path):
-        self.db_path = db_path
-        self._init_tables()
+        self.db_path = Path(db_path)
+        self._conn = self._connect()
+        
+        schema_key = (self.db_path, type(self))
+        if schema_key not in self._initialized:
+            self._init_tables()
+            self._initialized.add(schema_key)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión compartida por ruta; se abre una sola vez con sus PRAGMAs"""
+        conn = self._connections.get(self.db_path)
+        if conn is None:
+            conn = self._open(self.db_path)
+            self._connections[self.db_path] = conn
+        self._refs[self.db_path] = self._refs.get(self.db_path, 0) + 1
+        return conn
+    
+    @classmethod
+    def _open(cls, db_path: Path) -> sqlite3.Connection:
+        """Conexión persistente en autocommit; las transacciones son explícitas"""
+        conn = sqlite3.connect(
+            db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        for pragma in cls.PRAGMAS:
+            conn.execute(pragma)
+        return conn
     
     @contextmanager
-    def connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def connection(self, immediate: bool = False):
+        """
+        Transacción sobre la conexión persistente (reentrante)
+        
+        immediate=True toma el lock de escritura al empezar (BEGIN IMMEDIATE):
+        en WAL evita el SQLITE_BUSY de promover una lectura a escritura.
+        """
+        conn = self._conn
+        if conn.in_transaction:
+            yield conn
+            return
+    
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
         try:
             yield conn
-            conn.commit()
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    
+    @contextmanager
+    def bulk_load(self):
+        """Transacción para cargas masivas (backtests): sin fsync hasta terminar"""
+        conn = self._conn
+        conn.execute("PRAGMA synchronous=OFF")
+        try:
+            with self.connection(immediate=True) as conn:
+                yield conn
         finally:
-            conn.close()
+            conn.execute("PRAGMA synchronous=NORMAL")
+    
+    def _memoized(self, key: tuple, compute):
+        """
+        Reutiliza `compute(conn)` mientras la DB no cambie
+        
+        data_version avanza con commits de otras conexiones y total_changes
+        con los propios (el mtime no sirve en WAL hasta el checkpoint).
+        """
+        conn = self._conn
+        (version,) = conn.execute("PRAGMA data_version").fetchone()
+        stamp = (version, conn.total_changes)
+        
+        hit = self._memo.get((self.db_path, key))
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        
+        with self.connection() as conn:
+            value = compute(conn)
+        self._memo[(self.db_path, key)] = (stamp, value)
+        return value
+    
+    def close(self):
+        """Suelta la referencia de este repositorio a la conexión compartida"""
+        conn, self._conn = self._conn, None
+        if conn is None or self._connections.get(self.db_path) is not conn:
+            return  # ya cerrado (o cerrado por close_all)
+        
+        self._refs[self.db_path] -= 1
+        if self._refs[self.db_path] > 0:
+            return  # otros repositorios siguen usando la conexión
+        
+        del self._refs[self.db_path]
+        del self._connections[self.db_path]
+        # Los contadores de versión se reinician con la conexión
+        for memo_key in [k for k in self._memo if k[0] == self.db_path]:
+            del self._memo[memo_key]
+        self._initialized.difference_update(
+            [k for k in self._initialized if k[0] == self.db_path]
+        )
+        conn.close()
+    
+    def flush(self):
+        """Persiste escrituras diferidas (sin buffer por defecto)"""
+    
+    @classmethod
+    def close_all(cls):
+        for repo in list(cls._buffered):
+            repo.flush()
+        while cls._connections:
+            cls._connections.popitem()[1].close()
+        cls._refs.clear()
+        cls._memo.clear()
+        cls._initialized.clear()
+    
+    def _analyze_if_needed(self, conn: sqlite3.Connection, table: str):
+        """Ejecuta ANALYZE una sola vez cuando la tabla ya es grande"""
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        if has_stats and conn.execute(
+            "SELECT 1 FROM sqlite_stat1 WHERE tbl = ?", (table,)
+        ).fetchone():
+            return
+        
+        (rows,) = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()
+        if rows > self.ANALYZE_MIN_ROWS:
+            conn.execute(f"ANALYZE {table}")
     
     @abstractmethod
     def _init_tables(self):
         pass
 
 
+atexit.register(BaseRepository.close_all)
+
+
 # ============================================================================
 # BUY REPOSITORY
 # ============================================================================
@@ -129,7 +445,10 @@ class BaseRepository(ABC):
 class BuyRepository(BaseRepository):
     """Repositorio para señales de compra"""
     
-    def __init__(self, db_path: Path = None):
+    def __init__(self, db_path: Path = None, buffer_limit: int = 64):
+        # Buffer write-back para price_history (se vacía al llenarse o en close_all)
+        self._snapshot_buf: list[tuple] = []
+        self._buf_limit = buffer_limit
         super().__init__(db_path or config.db_path)
     
     def _init_tables(self):
@@ -163,49 +482,92 @@ class BuyRepository(BaseRepository):
                     rsi REAL
                 )
             """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_signals_ts ON signals(timestamp DESC)"
+            )
+            self._analyze_if_needed(conn, "signals")
+    
+    @staticmethod
+    def _signal_params(signal: BuySignal) -> tuple:
+        return (
+            signal.market_data.timestamp,
+            signal.signal_type.value,
+            signal.multiplier,
+            signal.suggested_amount,
+            _json.dumps(signal.reasons),
+            signal.market_data.price,
+            signal.market_data.ma7,
+            signal.market_data.ma21,
+            signal.market_data.ma200,
+            signal.market_data.rsi,
+            signal.market_data.pct_change_7d,
+        )
     
     def save_signal(self, signal: BuySignal) -> int:
-        with self.connection() as conn:
-            cursor = conn.execute("""
-                INSERT INTO signals (
-                    timestamp, signal_type, multiplier, suggested_amount, reasons,
-                    price, ma7, ma21, ma200, rsi, pct_change_7d
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                signal.market_data.timestamp,
-                signal.signal_type.value,
-                signal.multiplier,
-                signal.suggested_amount,
-                json.dumps(signal.reasons),
-                signal.market_data.price,
-                signal.market_data.ma7,
-                signal.market_data.ma21,
-                signal.market_data.ma200,
-                signal.market_data.rsi,
-                signal.market_data.pct_change_7d,
-            ))
+        with self.connection(immediate=True) as conn:
+            cursor = conn.execute(INSERT_SIGNAL_SQL, self._signal_params(signal))
             return cursor.lastrowid
     
-    def mark_notified(self, signal_id: int):
-        with self.connection() as conn:
-            conn.execute(
-                "UPDATE signals SET notification_sent = 1 WHERE id = ?",
-                (signal_id,)
+    def save_run(self, data: MarketData, signal: BuySignal) -> int:
+        """Persiste snapshot pendiente y señal de una ejecución en un solo COMMIT"""
+        with self.connection(immediate=True):
+            self.save_price_snapshot(data)
+            self.flush()
+            return self.save_signal(signal)
+    
+    def save_signals(self, signals: list[BuySignal]):
+        """Inserta varias señales en una sola transacción"""
+        with self.connection(immediate=True) as conn:
+            conn.executemany(
+                INSERT_SIGNAL_SQL, [self._signal_params(s) for s in signals]
             )
     
+    def mark_notified(self, signal_id: int):
+        with self.connection(immediate=True) as conn:
+            conn.execute(MARK_SIGNAL_NOTIFIED_SQL, (signal_id,))
+    
     def save_price_snapshot(self, data: MarketData):
-        with self.connection() as conn:
-            conn.execute("""
-                INSERT INTO price_history (timestamp, price, ma7, ma21, rsi)
-                VALUES (?, ?, ?, ?, ?)
-            """, (data.timestamp, data.price, data.ma7, data.ma21, data.rsi))
+        """Encola el snapshot; se persiste en lote vía flush()"""
+        self._snapshot_buf.append(self._snapshot_params(data))
+        # Solo se registra mientras tenga filas pendientes
+        self._buffered.add(self)
+        if len(self._snapshot_buf) >= self._buf_limit:
+            self.flush()
+    
+    def save_price_snapshots(self, datas: list[MarketData]):
+        """Inserta varios snapshots en una sola transacción"""
+        self._insert_snapshots([self._snapshot_params(d) for d in datas])
+    
+    def flush(self):
+        """Persiste los snapshots pendientes del buffer"""
+        self._buffered.discard(self)
+        if not self._snapshot_buf:
+            return
+        rows, self._snapshot_buf = self._snapshot_buf, []
+        self._insert_snapshots(rows)
     
-    def get_recent_signals(self, limit: int = 10) -> list[dict]:
+    def close(self):
+        self.flush()
+        super().close()
+    
+    @staticmethod
+    def _snapshot_params(data: MarketData) -> tuple:
+        return (data.timestamp, data.price, data.ma7, data.ma21, data.rsi)
+    
+    def _insert_snapshots(self, rows: list[tuple]):
+        with self.connection(immediate=True) as conn:
+            conn.executemany(INSERT_PRICE_SQL, rows)
+    
+    def get_recent_signals(self, limit: int = 10) -> list[SignalRow]:
         with self.connection() as conn:
-            rows = conn.execute("""
-                SELECT * FROM signals ORDER BY timestamp DESC LIMIT ?
-            """, (limit,)).fetchall()
-            return [dict(row) for row in rows]
+            cursor = conn.execute(SELECT_RECENT_SIGNALS_SQL, (limit,))
+            return [SignalRow(*row) for row in cursor]
+    
+    def get_signal_stats(self, limit: int = 100) -> BuyStats:
+        """Conteo por tipo y monto sugerido de las últimas `limit` señales"""
+        return self._memoized(("buy_stats", limit), lambda conn: BuyStats(
+            *conn.execute(SELECT_BUY_STATS_SQL, (limit,)).fetchone()
+        ))
 
 
 # ============================================================================
@@ -243,9 +605,21 @@ class SellRepository(BaseRepository):
                     indicators_json TEXT,
                     reasons_json TEXT,
                     notification_sent INTEGER DEFAULT 0,
-                    executed INTEGER DEFAULT 0
+                    executed INTEGER DEFAULT 0,
+                    rsi REAL,
+                    mvrv_zscore REAL,
+                    nupl REAL,
+                    mayer_multiple REAL,
+                    fear_greed REAL
                 )
             """)
+            # Migración: DBs creadas antes de las columnas de indicadores; el
+            # historial se completa desde indicators_json para que los agregados lo incluyan
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(sell_signals)")}
+            for col in SELL_INDICATOR_COLS:
+                if col not in existing:
+                    conn.execute(f"ALTER TABLE sell_signals ADD COLUMN {col} REAL")
+                    conn.execute(BACKFILL_INDICATOR_SQL.format(col=col), (SELL_INDICATOR_NAMES[col],))
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS sell_executions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -259,96 +633,144 @@ class SellRepository(BaseRepository):
                     FOREIGN KEY (signal_id) REFERENCES sell_signals(id)
                 )
             """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_sell_signals_ts ON sell_signals(timestamp DESC)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_sell_executions_signal ON sell_executions(signal_id)"
+            )
+            self._analyze_if_needed(conn, "sell_signals")
     
     def get_or_create_position(self) -> Position:
         with self.connection() as conn:
-            row = conn.execute(
-                "SELECT * FROM position WHERE id = 1"
-            ).fetchone()
-            
-            if not row:
-                conn.execute("""
-                    INSERT INTO position (id, total_btc, sold_btc, cost_basis, created_at, updated_at)
-                    VALUES (1, ?, 0, ?, ?, ?)
-                """, (
-                    config.sell.total_btc,
-                    config.sell.cost_basis_usd,
-                    datetime.now().isoformat(),
-                    datetime.now().isoformat(),
-                ))
-                return Position(
-                    total_btc=config.sell.total_btc,
-                    sold_btc=0,
-                    cost_basis=config.sell.cost_basis_usd
-                )
-            
-            return Position(
-                total_btc=row["total_btc"],
-                sold_btc=row["sold_btc"],
-                cost_basis=row["cost_basis"]
-            )
+            row = conn.execute(SELECT_POSITION_SQL).fetchone()
+        
+        if not row:
+            # Lock de escritura desde el inicio: en WAL, promover una lectura
+            # a escritura falla con SQLITE_BUSY sin esperar busy_timeout
+            ts = datetime.now().isoformat()
+            with self.connection(immediate=True) as conn:
+                self._insert_position_if_missing(conn, ts)
+                # Si otro proceso la creó antes, manda la fila guardada
+                row = conn.execute(SELECT_POSITION_SQL).fetchone()
+        
+        total_btc, sold_btc, cost_basis = row
+        return Position(total_btc=total_btc, sold_btc=sold_btc, cost_basis=cost_basis)
     
-    def save_signal(self, signal: SellSignal) -> int:
-        indicators_json = json.dumps([
-            {"name": i.name, "value": i.value, "level": i.level.value}
-            for i in signal.indicators
-        ])
+    @staticmethod
+    def _insert_position_if_missing(conn: sqlite3.Connection, ts: str):
+        conn.execute(INSERT_POSITION_IF_MISSING_SQL, (
+            config.sell.total_btc, config.sell.cost_basis_usd, ts, ts
+        ))
+    
+    def get_position_and_latest_signal(self) -> tuple[Position, Optional[SellSignalSummary]]:
+        """Posición y resumen de la última señal de venta (una sola consulta)"""
+        with self.connection() as conn:
+            row = conn.execute(SELECT_POSITION_WITH_LATEST_SQL).fetchone()
         
+        if not row:
+            return self.get_or_create_position(), None
+        
+        position = Position(total_btc=row[0], sold_btc=row[1], cost_basis=row[2])
+        latest = SellSignalSummary(*row[3:]) if row[3] is not None else None
+        return position, latest
+    
+    @staticmethod
+    def _signal_params(signal: SellSignal) -> tuple:
+        return (
+            signal.market_data.timestamp,
+            signal.market_data.price,
+            signal.risk_score,
+            signal.signal_type.value,
+            signal.sell_percentage,
+            signal.sell_amount_btc,
+            int(signal.pi_cycle_triggered),
+            _json.dumps([
+                {"name": i.name, "value": i.value, "level": i.level.value}
+                for i in signal.indicators
+            ]),
+            _json.dumps(signal.reasons),
+            *(getattr(signal.market_data, col) for col in SELL_INDICATOR_COLS),
+        )
+    
+    def get_recent_signals(self, limit: int = 10) -> list[SellSignalRow]:
         with self.connection() as conn:
-            cursor = conn.execute("""
-                INSERT INTO sell_signals (
-                    timestamp, price, risk_score, signal_type, sell_percentage,
-                    sell_amount_btc, pi_cycle_triggered, indicators_json, reasons_json
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                signal.market_data.timestamp,
-                signal.market_data.price,
-                signal.risk_score,
-                signal.signal_type.value,
-                signal.sell_percentage,
-                signal.sell_amount_btc,
-                int(signal.pi_cycle_triggered),
-                indicators_json,
-                json.dumps(signal.reasons),
-            ))
+            cursor = conn.execute(SELECT_RECENT_SELL_SIGNALS_SQL, (limit,))
+            return [SellSignalRow(*row) for row in cursor]
+    
+    def get_signal_stats(self) -> SellStats:
+        """Conteos, risk medio, USD vendidos y beneficio realizado sobre todo el historial"""
+        return self._memoized(("sell_stats",), lambda conn: SellStats(
+            *conn.execute(SELECT_SELL_STATS_SQL).fetchone()
+        ))
+    
+    def save_signal(self, signal: SellSignal) -> int:
+        with self.connection(immediate=True) as conn:
+            cursor = conn.execute(INSERT_SELL_SIGNAL_SQL, self._signal_params(signal))
             return cursor.lastrowid
     
-    def mark_notified(self, signal_id: int):
-        with self.connection() as conn:
-            conn.execute(
-                "UPDATE sell_signals SET notification_sent = 1 WHERE id = ?",
-                (signal_id,)
+    def save_signals(self, signals: list[SellSignal]):
+        """Inserta varias señales en una sola transacción"""
+        with self.connection(immediate=True) as conn:
+            conn.executemany(
+                INSERT_SELL_SIGNAL_SQL, [self._signal_params(s) for s in signals]
             )
     
+    def mark_notified(self, signal_id: int):
+        with self.connection(immediate=True) as conn:
+            conn.execute(MARK_SELL_NOTIFIED_SQL, (signal_id,))
+    
     def record_sale(self, btc_amount: float, price: float, 
                     exchange: str = "manual", signal_id: int = None) -> float:
         usd_received = btc_amount * price
+        ts = datetime.now().isoformat()
         
-        with self.connection() as conn:
-            conn.execute("""
-                INSERT INTO sell_executions 
-                (signal_id, timestamp, btc_sold, price_at_sale, usd_received, exchange)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (signal_id, datetime.now().isoformat(), btc_amount, price, usd_received, exchange))
+        with self.connection(immediate=True) as conn:
+            conn.execute(INSERT_EXECUTION_SQL, (
+                signal_id, ts, btc_amount, price, usd_received, exchange
+            ))
             
-            conn.execute("""
-                UPDATE position SET sold_btc = sold_btc + ?, updated_at = ? WHERE id = 1
-            """, (btc_amount, datetime.now().isoformat()))
+            # Sin fila de posición el UPDATE no afectaría nada y la venta se perdería
+            self._insert_position_if_missing(conn, ts)
+            conn.execute(UPDATE_POSITION_SOLD_SQL, (btc_amount, ts))
             
             if signal_id:
-                conn.execute(
-                    "UPDATE sell_signals SET executed = 1 WHERE id = ?",
-                    (signal_id,)
-                )
+                conn.execute(MARK_SELL_EXECUTED_SQL, (signal_id,))
         
         return usd_received
     
+    def record_sales_bulk(self, sales: list[tuple]) -> float:
+        """
+        Importa ventas históricas en una sola transacción
+        
+        sales: tuplas (timestamp, btc, price, exchange, signal_id | None).
+        La posición se actualiza una vez con el total vendido.
+        """
+        rows = [
+            (signal_id, ts, btc, price, btc * price, exchange)
+            for ts, btc, price, exchange, signal_id in sales
+        ]
+        total_btc = sum(row[2] for row in rows)
+        
+        ts = datetime.now().isoformat()
+        
+        with self.connection(immediate=True) as conn:
+            conn.executemany(INSERT_EXECUTION_SQL, rows)
+            self._insert_position_if_missing(conn, ts)
+            conn.execute(UPDATE_POSITION_SOLD_SQL, (total_btc, ts))
+            conn.executemany(
+                MARK_SELL_EXECUTED_SQL, [(row[0],) for row in rows if row[0]]
+            )
+        
+        return sum(row[4] for row in rows)
+    
     def reset_position(self, total_btc: float, cost_basis: float):
-        with self.connection() as conn:
+        ts = datetime.now().isoformat()
+        
+        with self.connection(immediate=True) as conn:
             conn.execute("DELETE FROM sell_executions")
             conn.execute("DELETE FROM sell_signals")
             conn.execute("DELETE FROM position")
-            conn.execute("""
-                INSERT INTO position (id, total_btc, sold_btc, cost_basis, created_at, updated_at)
-                VALUES (1, ?, 0, ?, ?, ?)
-            """, (total_btc, cost_basis, datetime.now().isoformat(), datetime.now().isoformat()))
\ No newline at end of file
+            conn.execute(INSERT_POSITION_SQL, (
+                total_btc, cost_basis, ts, ts
+            ))
\ No newline at end of file
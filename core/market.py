@@ -4,14 +4,125 @@ DCA Optimizer - Fetching y Cálculos de Mercado
 Centraliza todas las llamadas a APIs externas
 """
 
-from datetime import datetime
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
-import pandas as pd
-import requests
+import numpy as np
+from requests import RequestException
 
+from . import _json
+from ._http import cached_get_json, shared_session
+from ._njit import njit
+from .config import config
 from .database import MarketData
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+MS_PER_DAY = 86_400_000
+
+
+# ============================================================================
+# KERNELS NUMÉRICOS
+# ============================================================================
+
+@njit(cache=True)
+def _rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0.0:
+        return 100.0 if avg_gain > 0.0 else 50.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+@njit(cache=True)
+def _indicators(prices: np.ndarray, windows: np.ndarray, period: int):
+    """MAs (min_periods=1) y RSI de Wilder en una sola pasada, más el cambio 7d"""
+    n = prices.shape[0]
+    k = windows.shape[0]
+    mas = np.empty((n, k))
+    sums = np.zeros(k)
+    rsi = np.full(n, 50.0)  # Neutral si no hay suficientes datos
+    # Cambio 7d fuera del bucle: un slice sin condicional (vacío si n <= 7)
+    pct7 = np.zeros(n)
+    pct7[7:] = (prices[7:] / prices[:-7] - 1.0) * 100.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    
+    for i in range(n):
+        price = prices[i]
+        
+        # Suma deslizante por ventana: entra el nuevo, sale el de hace w
+        for j in range(k):
+            w = windows[j]
+            sums[j] += price
+            if i >= w:
+                sums[j] -= prices[i - w]
+            mas[i, j] = sums[j] / min(i + 1, w)
+        
+        # RSI: RMA de Wilder (alpha = 1/period), la convención de TradingView
+        # y pandas-ta; semilla = media simple de las primeras `period` variaciones
+        if i == 0:
+            continue
+        delta = price - prices[i - 1]
+        gain = delta if delta > 0.0 else 0.0
+        loss = -delta if delta < 0.0 else 0.0
+        if i < period:
+            avg_gain += gain
+            avg_loss += loss
+        elif i == period:
+            avg_gain = (avg_gain + gain) / period
+            avg_loss = (avg_loss + loss) / period
+            rsi[i] = _rsi_from_averages(avg_gain, avg_loss)
+        else:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+            rsi[i] = _rsi_from_averages(avg_gain, avg_loss)
+    
+    return mas, rsi, pct7
+
+
+@njit(cache=True)
+def _moments(prices: np.ndarray, current: float):
+    """Media, desviación (ddof=1) y días bajo `current` en una sola pasada (Welford)"""
+    mean = 0.0
+    m2 = 0.0
+    below = 0
+    for i in range(prices.shape[0]):
+        price = prices[i]
+        delta = price - mean
+        mean += delta / (i + 1)
+        m2 += delta * (price - mean)
+        if price < current:
+            below += 1
+    n = prices.shape[0]
+    std = np.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+    return mean, std, below
+
+
+@dataclass(slots=True, frozen=True)
+class _DailySeries:
+    """Último precio de cada día UTC con sus indicadores (solo NumPy)"""
+    ts: np.ndarray        # ms del último tick de cada día
+    price: np.ndarray     # float64
+    windows: tuple[int, ...]
+    mas: np.ndarray       # (n, len(windows)) float64
+    rsi: np.ndarray       # float64
+    pct_7d: np.ndarray    # float64
+    
+    def ma(self, window: int) -> np.ndarray:
+        return self.mas[:, self.windows.index(window)]
+
+
+@dataclass
+class _PriceSummary:
+    """Estadísticos de la serie histórica usados por los estimadores on-chain"""
+    count: int
+    mean: float
+    std: float
+    profit_ratio: float
+
 
 class MarketDataService:
     """Servicio centralizado para obtener datos de mercado"""
@@ -20,23 +131,42 @@ class MarketDataService:
     FEAR_GREED_URL = "https://api.alternative.me/fng/?limit=1"
     COINMETRICS_URL = "https://community-api.coinmetrics.io/v4/timeseries/asset-metrics"
     
+    # Segundos que el precio spot se sirve desde el cache en disco
+    PRICE_TTL = 60
+    
+    # (connect, read) para consultas interactivas: un DNS/TLS colgado falla rápido
+    INTERACTIVE_TIMEOUT = (2, 5)
+    
+    # Ventanas de las medias móviles de la serie diaria
+    MA_WINDOWS = (7, 21, 50, 200)
+    
+    # Fallos esperables de red o de payload; cualquier otro error se propaga
+    FETCH_ERRORS = (RequestException, ValueError, KeyError, IndexError, TypeError)
+    
     def __init__(self, timeout: int = 15):
         self.timeout = timeout
+        self._session = shared_session()
+        # Pool reutilizable para las llamadas de red independientes
+        self._io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-io")
         self._price_cache: Optional[dict] = None
-        self._historical_cache: Optional[pd.DataFrame] = None
+        # days -> (fecha UTC, Last-Modified, cierres); los días cerrados cambian 1 vez al día
+        self._historical_cache: dict[int, tuple[date, Optional[str], np.ndarray]] = {}
+        # days -> (cierres, precio actual, serie): se reconstruye si cambia el precio
+        self._series_cache: dict[int, tuple[np.ndarray, float, _DailySeries]] = {}
+        # days -> (serie de origen, DataFrame) para get_historical_prices
+        self._frame_cache: dict[int, tuple[_DailySeries, "pd.DataFrame"]] = {}
     
     # ========================================================================
     # PRICE DATA
     # ========================================================================
     
-    def get_current_price(self) -> dict:
-        """Precio actual con cambios 24h/7d"""
+    def get_current_price(self, timeout=None) -> dict:
+        """Precio actual con cambios 24h/7d (cache en disco de PRICE_TTL segundos)"""
         url = f"{self.COINGECKO_BASE}/coins/bitcoin"
         params = {"localization": "false", "tickers": "false", "community_data": "false"}
         
-        r = requests.get(url, params=params, timeout=self.timeout)
-        r.raise_for_status()
-        data = r.json()["market_data"]
+        data = cached_get_json(url, params, ttl=self.PRICE_TTL,
+                               timeout=timeout or self.timeout)["market_data"]
         
         self._price_cache = {
             "price": data["current_price"]["usd"],
@@ -47,75 +177,189 @@ class MarketDataService:
         }
         return self._price_cache
     
-    def get_historical_prices(self, days: int = 365) -> pd.DataFrame:
-        """Precios históricos con indicadores calculados"""
+    def get_daily_series(self, days: int = 365,
+                         current_price: Optional[float] = None) -> _DailySeries:
+        """
+        Serie diaria con indicadores: cierres de días completos + precio actual
+        
+        Solo los días cerrados se cachean (1 vez por día UTC); la última barra es
+        siempre `current_price` (o el spot actual), como en cada ejecución del cron.
+        """
+        closes = self._get_daily_closes(days)
+        if current_price is None:
+            current_price = self.get_current_price()["price"]
+        
+        cached = self._series_cache.get(days)
+        if cached and cached[0] is closes and cached[1] == current_price:
+            return cached[2]
+        
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        series = self._build_series(np.vstack((closes, [(now_ms, current_price)])))
+        self._series_cache[days] = (closes, current_price, series)
+        return series
+    
+    def latest_series(self, days: int = 365) -> _DailySeries:
+        """Última serie construida para `days` (la de este run) o una nueva con el spot"""
+        cached = self._series_cache.get(days)
+        if cached and cached[0] is self._get_daily_closes(days):
+            return cached[2]
+        return self.get_daily_series(days)
+    
+    def _get_daily_closes(self, days: int) -> np.ndarray:
+        """Pares [ts_ms, price] de días UTC ya cerrados (cache en memoria y disco)"""
+        today = datetime.now(timezone.utc).date()
+        cached = self._historical_cache.get(days)
+        if cached and cached[0] == today:
+            return cached[2]
+        
+        # Entre procesos (cron): los cierres del día quedan en disco
+        disk_path = self._history_disk_path(days, today)
+        if not cached and disk_path.exists():
+            closes = self._completed_days(np.load(disk_path, allow_pickle=False), today)
+            self._historical_cache[days] = (today, None, closes)
+            return closes
+        
         url = f"{self.COINGECKO_BASE}/coins/bitcoin/market_chart"
         params = {"vs_currency": "usd", "days": days}
+        headers = {"If-Modified-Since": cached[1]} if cached and cached[1] else {}
         
-        r = requests.get(url, params=params, timeout=self.timeout)
+        r = self._session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if r.status_code == 304 and cached:
+            self._historical_cache[days] = (today, cached[1], cached[2])
+            return cached[2]
         r.raise_for_status()
-        data = r.json()
+        data = _json.loads(r.content)
         
-        df = pd.DataFrame(data["prices"], columns=["ts", "price"])
-        df["date"] = pd.to_datetime(df["ts"], unit="ms")
-        df.set_index("date", inplace=True)
-        df = df.resample("D").last()
+        arr = np.asarray(data["prices"], dtype=np.float64).reshape(-1, 2)
+        closes = self._completed_days(arr, today)
+        self._save_history(disk_path, closes)
         
-        # Calcular MAs (usar min_periods para evitar NaN innecesarios)
-        df["ma7"] = df["price"].rolling(7, min_periods=1).mean()
-        df["ma21"] = df["price"].rolling(21, min_periods=1).mean()
-        df["ma50"] = df["price"].rolling(50, min_periods=1).mean()
-        df["ma200"] = df["price"].rolling(200, min_periods=1).mean()
+        self._historical_cache[days] = (today, r.headers.get("Last-Modified"), closes)
+        return closes
+    
+    @staticmethod
+    def _completed_days(arr: np.ndarray, today: date) -> np.ndarray:
+        """Descarta los puntos del día en curso (el último es el precio intradía)"""
+        today_ms = (today - date(1970, 1, 1)).days * MS_PER_DAY
+        return np.ascontiguousarray(arr[arr[:, 0] < today_ms])
+    
+    def get_historical_prices(self, days: int = 365) -> "pd.DataFrame":
+        """Serie diaria como DataFrame indexado por fecha (pandas se importa aquí)"""
+        import pandas as pd
+        
+        series = self.get_daily_series(days)
+        cached = self._frame_cache.get(days)
+        if cached and cached[0] is series:
+            return cached[1]
+        
+        columns = {"ts": series.ts, "price": series.price}
+        for k, window in enumerate(series.windows):
+            columns[f"ma{window}"] = series.mas[:, k]
+        columns["rsi"] = series.rsi
+        columns["pct_7d"] = series.pct_7d
+        index = pd.DatetimeIndex(
+            pd.to_datetime(series.ts // MS_PER_DAY * MS_PER_DAY, unit="ms"), name="date"
+        )
+        
+        df = pd.DataFrame(columns, index=index)
+        self._frame_cache[days] = (series, df)
+        return df
+    
+    @staticmethod
+    def _history_disk_path(days: int, today: date) -> Path:
+        return config.cache_dir / f"cg_{days}_{today.isoformat()}.npy"
+    
+    @staticmethod
+    def _save_history(path: Path, arr: np.ndarray):
+        """Guarda los cierres del día y borra los de días anteriores"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, arr, allow_pickle=False)
+            tmp.replace(path)
+            prefix = path.name.rsplit("_", 1)[0]
+            for old in path.parent.glob(f"{prefix}_*.npy"):
+                if old != path:
+                    old.unlink(missing_ok=True)
+        except OSError:
+            pass  # El cache en disco es opcional
+    
+    def _build_series(self, arr: np.ndarray) -> _DailySeries:
+        """Serie diaria con indicadores a partir de pares [ts_ms, price]"""
+        arr = arr[~np.isnan(arr[:, 1])]
+        ts = arr[:, 0].astype(np.int64)
         
-        # RSI
-        df["rsi"] = self.calculate_rsi(df["price"], 14)
-        df["rsi"] = df["rsi"].fillna(50)  # Neutral si no hay suficientes datos
+        # Último precio de cada día (los datos vienen ordenados y casi diarios)
+        day = ts // MS_PER_DAY
+        last = np.ones(day.size, dtype=bool)
+        last[:-1] = day[1:] != day[:-1]
+        ts = ts[last]
+        prices = np.ascontiguousarray(arr[last, 1])
         
-        # Cambio 7d
-        df["pct_7d"] = df["price"].pct_change(7) * 100
-        df["pct_7d"] = df["pct_7d"].fillna(0)
+        # MAs, RSI y cambio 7d en un único kernel
+        windows = self.MA_WINDOWS
+        mas, rsi, pct7 = _indicators(prices, np.array(windows, dtype=np.int64), 14)
         
-        self._historical_cache = df.dropna(subset=["price"])
-        return self._historical_cache
+        return _DailySeries(
+            ts=ts,
+            price=prices,
+            windows=windows,
+            mas=mas,
+            rsi=rsi,
+            pct_7d=pct7,
+        )
     
     # ========================================================================
     # TECHNICAL INDICATORS
     # ========================================================================
     
     @staticmethod
-    def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
-        """Calcula RSI - método unificado"""
-        delta = prices.diff()
-        gain = delta.where(delta > 0, 0).rolling(period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+    def calculate_rsi(prices: np.ndarray, period: int = 14) -> np.ndarray:
+        """Calcula RSI (Wilder) - método unificado (NaN hasta `period`)"""
+        prices = np.asarray(prices, dtype=np.float64)
+        _, rsi, _ = _indicators(prices, np.empty(0, dtype=np.int64), period)
+        rsi[:period] = np.nan
+        return rsi
     
     @staticmethod
     def calculate_mayer_multiple(price: float, ma_200: float) -> float:
         """Mayer Multiple = Price / 200 MA"""
         return price / ma_200 if ma_200 > 0 else 1.0
     
-    def check_pi_cycle(self, df: pd.DataFrame) -> bool:
+    def check_pi_cycle(self, prices: np.ndarray) -> bool:
         """
         Pi Cycle Top: 111 DMA cruza por encima de 2x 350 DMA
         Históricamente predijo tops con 3 días de precisión
         """
-        if len(df) < 350:
+        if len(prices) < 350:
             return False
         
-        ma_111 = df["price"].rolling(111).mean()
-        ma_350_x2 = df["price"].rolling(350).mean() * 2
+        # Solo se necesitan las 4 últimas medias (cruce en los últimos 3 días)
+        ma_111, ma_350 = self._tail_means(prices, (111, 350), 4)
+        ma_350_x2 = ma_350 * 2
         
-        # Verificar cruce reciente (últimos 3 días)
-        for i in range(-3, 0):
-            if (ma_111.iloc[i] >= ma_350_x2.iloc[i] and 
-                ma_111.iloc[i - 1] < ma_350_x2.iloc[i - 1]):
-                return True
+        # Cruce reciente (últimos 3 días): arriba hoy y abajo el día anterior
+        above = ma_111 >= ma_350_x2
+        if (above[1:] & (ma_111[:-1] < ma_350_x2[:-1])).any():
+            return True
         
         # Alertar si está muy cerca del cruce (<2%)
-        current_gap = (ma_350_x2.iloc[-1] - ma_111.iloc[-1]) / ma_350_x2.iloc[-1]
-        return current_gap < 0.02
+        current_gap = (ma_350_x2[-1] - ma_111[-1]) / ma_350_x2[-1]
+        return bool(current_gap < 0.02)
+    
+    @staticmethod
+    def _tail_means(prices: np.ndarray, windows: tuple[int, ...], count: int) -> np.ndarray:
+        """Medias de los últimos `count` puntos por ventana, con una sola suma acumulada"""
+        tail = np.asarray(prices[-(max(windows) + count - 1):], dtype=np.float64)
+        csum = np.concatenate(([0.0], np.cumsum(tail)))
+        end = np.arange(csum.size - count, csum.size)
+        
+        means = np.full((len(windows), count), np.nan)  # NaN sin ventana completa
+        for k, window in enumerate(windows):
+            start = end - window
+            full = start >= 0
+            means[k, full] = (csum[end[full]] - csum[start[full]]) / window
+        return means
     
     # ========================================================================
     # ON-CHAIN & SENTIMENT
@@ -123,10 +367,13 @@ class MarketDataService:
     
     def get_fear_greed_index(self) -> int:
         """Fear & Greed Index (0-100)"""
+        # Los 429 los reintenta la sesión respetando Retry-After
         try:
-            r = requests.get(self.FEAR_GREED_URL, timeout=10)
-            return int(r.json()["data"][0]["value"])
-        except Exception:
+            r = self._session.get(self.FEAR_GREED_URL, timeout=10)
+            r.raise_for_status()
+            return int(_json.loads(r.content)["data"][0]["value"])
+        except self.FETCH_ERRORS as e:
+            print(f"⚠️ Fear & Greed no disponible, usando neutral: {e!r}")
             return 50  # Neutral si falla
     
     def get_onchain_metrics(self) -> dict:
@@ -142,71 +389,98 @@ class MarketDataService:
                 "sort": "time",
                 "sort_ascending": "false",
             }
-            r = requests.get(self.COINMETRICS_URL, params=params, timeout=10)
+            r = self._session.get(self.COINMETRICS_URL, params=params, timeout=10)
             if r.status_code == 200:
-                data = r.json()
+                data = _json.loads(r.content)
                 if data.get("data"):
                     mvrv = float(data["data"][0]["CapMVRVCur"])
                     metrics["mvrv_zscore"] = (mvrv - 1.5) / 0.8
-        except Exception:
-            pass
+        except self.FETCH_ERRORS as e:
+            print(f"⚠️ CoinMetrics no disponible, se estima MVRV: {e!r}")
         
         return metrics
     
-    def estimate_mvrv_from_price(self, price: float, df: pd.DataFrame) -> float:
+    @staticmethod
+    def _summarize(prices: np.ndarray, current: float) -> _PriceSummary:
+        """Media, desviación y ratio de días en ganancia sobre un único array"""
+        # float: la misma firma que compila `make warmup` (el spot puede llegar como int)
+        mean, std, below = _moments(prices, float(current))
+        return _PriceSummary(
+            count=prices.size,
+            mean=float(mean),
+            std=float(std),
+            profit_ratio=below / prices.size,
+        )
+    
+    @staticmethod
+    def estimate_mvrv_from_price(price: float, summary: _PriceSummary) -> float:
         """Estima MVRV Z-Score basado en desviación del precio"""
-        if len(df) < 200:
+        if summary.count < 200:
             return 1.0
         
-        mean_price = df["price"].mean()
-        std_price = df["price"].std()
-        z_score = (price - mean_price) / std_price if std_price > 0 else 0
+        z_score = (price - summary.mean) / summary.std if summary.std > 0 else 0
         return max(0, min(10, z_score * 1.5 + 2))
     
-    def estimate_nupl(self, price: float, df: pd.DataFrame) -> float:
+    @staticmethod
+    def estimate_nupl(summary: _PriceSummary) -> float:
         """Estima NUPL basado en % de días en ganancia"""
-        if len(df) < 100:
+        if summary.count < 100:
             return 0.5
         
-        days_in_profit = (df["price"] < price).sum()
-        total_days = len(df)
-        nupl = (days_in_profit / total_days) - 0.5
+        nupl = summary.profit_ratio - 0.5
         return max(-1, min(1, nupl * 1.5))
     
     # ========================================================================
     # MARKET DATA BUILDER
     # ========================================================================
     
-    def get_full_market_data(self, for_sell: bool = False) -> MarketData:
-        """Obtiene MarketData completo para buy o sell"""
-        price_data = self.get_current_price()
-        historical = self.get_historical_prices(365 if for_sell else 30)
+    def get_full_market_data(self, for_sell: bool = False,
+                             timestamp: Optional[str] = None) -> MarketData:
+        """Obtiene MarketData completo para buy o sell (timestamp: el del run)"""
+        days = 365 if for_sell else 30
+        
+        # Las llamadas son independientes: se lanzan en paralelo
+        f_price = self._io_pool.submit(self.get_current_price)
+        f_closes = self._io_pool.submit(self._get_daily_closes, days)
+        if for_sell:
+            f_onchain = self._io_pool.submit(self.get_onchain_metrics)
+            f_fg = self._io_pool.submit(self.get_fear_greed_index)
         
+        price_data = f_price.result()
         current_price = price_data["price"]
-        latest = historical.iloc[-1]
         
-        market_data = MarketData(
+        # Cierres cacheados por día + el precio de este run como última barra
+        f_closes.result()
+        series = self.get_daily_series(days, current_price)
+        
+        ma7 = float(series.ma(7)[-1])
+        ma21 = float(series.ma(21)[-1])
+        ma200 = float(series.ma(200)[-1])
+        
+        extra = {}
+        if for_sell:
+            onchain = f_onchain.result()
+            summary = self._summarize(series.price, current_price)
+            extra = {
+                "mvrv_zscore": onchain.get("mvrv_zscore") or
+                    self.estimate_mvrv_from_price(current_price, summary),
+                "nupl": self.estimate_nupl(summary),
+                "mayer_multiple": self.calculate_mayer_multiple(current_price, ma200),
+                "fear_greed": f_fg.result(),
+            }
+        
+        # MarketData es inmutable: se construye una sola vez con todos los campos
+        return MarketData(
             price=round(current_price, 2),
-            ma7=round(latest["ma7"], 2),
-            ma21=round(latest["ma21"], 2),
-            ma200=round(latest.get("ma200", latest["ma21"]), 2),
+            ma7=round(ma7, 2),
+            ma21=round(ma21, 2),
+            ma200=round(ma200, 2),
             pct_change_24h=round(price_data["change_24h"], 2),
             pct_change_7d=round(price_data["change_7d"], 2),
-            rsi=round(float(latest["rsi"]), 2),
-            timestamp=datetime.now().isoformat(),
+            rsi=round(float(series.rsi[-1]), 2),
+            timestamp=timestamp or datetime.now().isoformat(),
+            **extra,
         )
-        
-        if for_sell:
-            onchain = self.get_onchain_metrics()
-            market_data.mvrv_zscore = onchain.get("mvrv_zscore") or \
-                self.estimate_mvrv_from_price(current_price, historical)
-            market_data.nupl = self.estimate_nupl(current_price, historical)
-            market_data.mayer_multiple = self.calculate_mayer_multiple(
-                current_price, latest["ma200"]
-            )
-            market_data.fear_greed = self.get_fear_greed_index()
-        
-        return market_data
 
 
 # Singleton instance
@@ -5,11 +5,11 @@ Mensajes claros, sin ambigüedad, con CTA explícito
 """
 
 from abc import ABC, abstractmethod
-from datetime import datetime, UTC
+from bisect import bisect_left
+from datetime import datetime, timezone
 
-import requests
-
-from .config import config, SignalType
+from ._http import shared_session
+from .config import config, SignalType, RiskLevel
 from .database import BuySignal, SellSignal, Position
 
 
@@ -24,9 +24,13 @@ class NotificationService(ABC):
 class TelegramNotifier(NotificationService):
     """Implementación de notificaciones via Telegram"""
     
+    # (connect, read): un host caído falla rápido sin recortar la respuesta
+    TIMEOUT = (3.05, 10)
+    
     def __init__(self):
         self.token = config.telegram.token
         self.chat_id = config.telegram.chat_id
+        self.url = f"https://api.telegram.org/bot{self.token}/sendMessage"
     
     @property
     def is_configured(self) -> bool:
@@ -37,7 +41,6 @@ class TelegramNotifier(NotificationService):
             print("⚠️ Telegram no configurado")
             return False
         
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
         payload = {
             "chat_id": self.chat_id,
             "text": message,
@@ -45,7 +48,7 @@ class TelegramNotifier(NotificationService):
         }
         
         try:
-            r = requests.post(url, json=payload, timeout=10)
+            r = shared_session().post(self.url, json=payload, timeout=self.TIMEOUT)
             r.raise_for_status()
             return True
         except Exception as e:
@@ -57,6 +60,17 @@ class TelegramNotifier(NotificationService):
 # MESSAGE FORMATTERS - MENSAJES CLAROS Y SIN AMBIGÜEDAD
 # ============================================================================
 
+LEVEL_EMOJI = {
+    RiskLevel.SAFE: "✅",
+    RiskLevel.WARNING: "🟡",
+    RiskLevel.DANGER: "🟠",
+    RiskLevel.CRITICAL: "🔴",
+}
+
+# Barra de riesgo por tramo de 20 puntos (0-100 → 0-5 bloques)
+_RISK_BARS = tuple("🔴" * n + "⚪" * (5 - n) for n in range(6))
+
+
 class BuyMessageFormatter:
     """Formatea mensajes de COMPRA con CTA claro"""
     
@@ -67,6 +81,16 @@ class BuyMessageFormatter:
         SignalType.SKIP: ("⏸️ NO COMPRAR", "Mercado sobrecomprado"),
     }
     
+    SEPARATOR = "━" * 27
+    INDICATORS_HEADER = "📈 *Indicadores:*"
+    REASONS_HEADER = "📝 *Razón:*"
+    TIMING_NOTE = "⏰ *Ventana óptima activa* (Early Asian session)"
+    NO_BUY_LINE = "❌ *No invertir esta semana*"
+    
+    # RSI <= 35 bajo, <= 65 ok, resto alto
+    RSI_CUTS = (35, 65)
+    RSI_LABELS = ("🔥 Bajo", "✅ OK", "⚠️ Alto")
+    
     @classmethod
     def format(cls, signal: BuySignal) -> str:
         action, description = cls.ACTION_MAP.get(
@@ -75,55 +99,99 @@ class BuyMessageFormatter:
         )
         
         data = signal.market_data
-        now = datetime.now(UTC)
+        now = datetime.now(timezone.utc)
+        
+        # Determinar si requiere acción inmediata
+        if signal.signal_type is not SignalType.SKIP:
+            money_line = f"💰 *Monto a invertir:* `${signal.suggested_amount:,.2f}`"
+        else:
+            money_line = cls.NO_BUY_LINE
+        
+        rsi_label = cls.RSI_LABELS[bisect_left(cls.RSI_CUTS, data.rsi)]
+        
+        parts = [
+            cls.SEPARATOR, action, cls.SEPARATOR, "",
+            money_line,
+            f"📊 Precio BTC: `${data.price:,.2f}`",
+            "",
+            cls.INDICATORS_HEADER,
+            f"• RSI: `{data.rsi}` {rsi_label}",
+            f"• vs MA7: `{((data.price/data.ma7)-1)*100:+.1f}%`",
+            f"• 7 días: `{data.pct_change_7d:+.1f}%`",
+            "",
+            cls.REASONS_HEADER,
+        ]
+        parts.extend(f"• {r}" for r in signal.reasons)
+        if not signal.reasons:
+            parts.append("")
         
         # Timing óptimo
-        timing_note = ""
+        parts.append("")
         if now.weekday() == 6 and 2 <= now.hour <= 5:
-            timing_note = "\n⏰ *Ventana óptima activa* (Early Asian session)"
-        
-        # Determinar si requiere acción inmediata
-        is_actionable = signal.signal_type not in [SignalType.SKIP]
+            parts.append(cls.TIMING_NOTE)
+        parts.append("")
         
-        if is_actionable:
-            header = f"""
+        parts.append(f"_Multiplicador: x{signal.multiplier} | {description}_")
+        return "\n".join(parts)
+
+
+class SellMessageFormatter:
+    """Formatea mensajes de VENTA con CTA claro"""
+    
+    # Plantillas fijas: en cada envío solo se sustituyen los valores
+    SELL_HEADER = """
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━
-{action}
+🚨 VENDER {pct:.0f}% DE TU POSICIÓN
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-💰 *Monto a invertir:* `${signal.suggested_amount:,.2f}`
-📊 Precio BTC: `${data.price:,.2f}`
+⚡ *ACCIÓN REQUERIDA*
+💰 Vender: `{btc:.4f} BTC`
+💵 Valor aprox: `${usd:,.2f}`
 """
-        else:
-            header = f"""
+    
+    ALERT_HEADER = """
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━
-{action}
+⚠️ ALERTA: MERCADO EN ZONA DE PRECAUCIÓN
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-❌ *No invertir esta semana*
-📊 Precio BTC: `${data.price:,.2f}`
+📋 *ACCIÓN:* Monitorear de cerca
+🎯 Preparar venta de `{pct:.0f}%` si empeora
 """
-        
-        # Razones claras
-        reasons_text = "\n".join([f"• {r}" for r in signal.reasons])
-        
-        return f"""
+    
+    HOLD_HEADER = """
+━━━━━━━━━━━━━━━━━━━━━━━━━━━
+✅ MANTENER POSICIÓN
+━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+📋 *ACCIÓN:* No se requiere venta
+🎯 Indicadores en zona segura
+"""
+    
+    HEADERS = {
+        SignalType.SELL: SELL_HEADER,
+        SignalType.ALERT: ALERT_HEADER,
+    }
+    
+    TEMPLATE = """
 {header}
-📈 *Indicadores:*
-• RSI: `{data.rsi}` {'⚠️ Alto' if data.rsi > 65 else '✅ OK' if data.rsi > 35 else '🔥 Bajo'}
-• vs MA7: `{((data.price/data.ma7)-1)*100:+.1f}%`
-• 7 días: `{data.pct_change_7d:+.1f}%`
 
-📝 *Razón:*
-{reasons_text}
-{timing_note}
+📊 *Mercado:*
+• Precio: `${price:,.2f}`
+• 24h: `{pct_24h:+.1f}%` | 7d: `{pct_7d:+.1f}%`
+• Risk Score: `{risk}/100` {risk_bar}
+
+{indicators}
 
-_Multiplicador: x{signal.multiplier} | {description}_
-""".strip()
+💼 *Tu posición:*
+• BTC restante: `{remaining:.4f}` ({remaining_pct:.0f}%)
+• Valor actual: `${value:,.2f}`
+• P&L: `${pnl:+,.2f}` (`{pnl_pct:+.1f}%`)
 
+📝 *Análisis:*
+{reasons}
 
-class SellMessageFormatter:
-    """Formatea mensajes de VENTA con CTA claro"""
+_Mejor horario para vender: Lun-Vie 14:00-21:00 UTC_
+"""
     
     @classmethod
     def format(cls, signal: SellSignal, position: Position) -> str:
@@ -136,84 +204,38 @@ class SellMessageFormatter:
         pnl_pct = (unrealized_pnl / cost_of_remaining * 100) if cost_of_remaining > 0 else 0
         
         # Header según tipo de señal
-        if signal.signal_type == SignalType.SELL:
-            header = cls._format_sell_header(signal)
-        elif signal.signal_type == SignalType.ALERT:
-            header = cls._format_alert_header(signal)
-        else:
-            header = cls._format_hold_header(signal)
+        header = cls.HEADERS.get(signal.signal_type, cls.HOLD_HEADER).format(
+            pct=signal.sell_percentage * 100,
+            btc=signal.sell_amount_btc,
+            usd=signal.sell_amount_usd,
+        )
         
         # Risk bar visual
-        risk_bar = "🔴" * (signal.risk_score // 20) + "⚪" * (5 - signal.risk_score // 20)
-        
-        # Indicadores críticos
-        indicators_text = cls._format_indicators(signal.indicators)
-        
-        # Razones
-        reasons_text = "\n".join(signal.reasons[:5])
+        risk_bar = _RISK_BARS[min(signal.risk_score // 20, 5)]
         
-        return f"""
-{header}
-
-📊 *Mercado:*
-• Precio: `${data.price:,.2f}`
-• 24h: `{data.pct_change_24h:+.1f}%` | 7d: `{data.pct_change_7d:+.1f}%`
-• Risk Score: `{signal.risk_score}/100` {risk_bar}
-
-{indicators_text}
-
-💼 *Tu posición:*
-• BTC restante: `{position.remaining_btc:.4f}` ({position.remaining_btc/position.total_btc*100:.0f}%)
-• Valor actual: `${current_value:,.2f}`
-• P&L: `${unrealized_pnl:+,.2f}` (`{pnl_pct:+.1f}%`)
-
-📝 *Análisis:*
-{reasons_text}
-
-_Mejor horario para vender: Lun-Vie 14:00-21:00 UTC_
-""".strip()
-    
-    @classmethod
-    def _format_sell_header(cls, signal: SellSignal) -> str:
-        return f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🚨 VENDER {signal.sell_percentage*100:.0f}% DE TU POSICIÓN
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-⚡ *ACCIÓN REQUERIDA*
-💰 Vender: `{signal.sell_amount_btc:.4f} BTC`
-💵 Valor aprox: `${signal.sell_amount_usd:,.2f}`
-"""
-    
-    @classmethod
-    def _format_alert_header(cls, signal: SellSignal) -> str:
-        return f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-⚠️ ALERTA: MERCADO EN ZONA DE PRECAUCIÓN
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📋 *ACCIÓN:* Monitorear de cerca
-🎯 Preparar venta de `{signal.sell_percentage*100:.0f}%` si empeora
-"""
-    
-    @classmethod
-    def _format_hold_header(cls, signal: SellSignal) -> str:
-        return f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-✅ MANTENER POSICIÓN
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📋 *ACCIÓN:* No se requiere venta
-🎯 Indicadores en zona segura
-"""
+        return cls.TEMPLATE.format(
+            header=header,
+            price=data.price,
+            pct_24h=data.pct_change_24h,
+            pct_7d=data.pct_change_7d,
+            risk=signal.risk_score,
+            risk_bar=risk_bar,
+            indicators=cls._format_indicators(signal.indicators),
+            remaining=position.remaining_btc,
+            remaining_pct=position.remaining_btc / position.total_btc * 100,
+            value=current_value,
+            pnl=unrealized_pnl,
+            pnl_pct=pnl_pct,
+            reasons="\n".join(signal.reasons[:5]),
+        ).strip()
     
     @classmethod
     def _format_indicators(cls, indicators: list) -> str:
+        emoji = LEVEL_EMOJI.get
         lines = ["📈 *Indicadores:*"]
-        for ind in indicators:
-            emoji = {"SAFE": "✅", "WARNING": "🟡", "DANGER": "🟠", "CRITICAL": "🔴"}
-            level_emoji = emoji.get(ind.level.value, "❓")
-            lines.append(f"• {level_emoji} {ind.name}: `{ind.value:.2f}`")
+        lines.extend(
+            f"• {emoji(ind.level, '❓')} {ind.name}: `{ind.value:.2f}`" for ind in indicators
+        )
         return "\n".join(lines)
 
 
@@ -242,5 +264,14 @@ class DCANotifier:
         return self.telegram.send(message)
 
 
-# Singleton
-notifier = DCANotifier()
\ No newline at end of file
+# Singleton perezoso (PEP 562): se construye en el primer acceso a `notifier`
+_notifier: DCANotifier | None = None
+
+
+def __getattr__(name: str):
+    global _notifier
+    if name == "notifier":
+        if _notifier is None:
+            _notifier = DCANotifier()
+        return _notifier
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
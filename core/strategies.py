@@ -8,7 +8,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Protocol
 
-import pandas as pd
+import numpy as np
 
 from .config import config, SignalType, RiskLevel
 from .database import MarketData, BuySignal, SellSignal, Indicator, Position
@@ -41,35 +41,75 @@ class DCABuyStrategy:
     - NORMAL_DCA en otros casos
     """
     
+    # Códigos que devuelve evaluate_series(), en orden de prioridad
+    SERIES_TYPES = (
+        SignalType.SKIP, SignalType.TURBO_BUY, SignalType.EXTRA_BUY, SignalType.NORMAL_DCA,
+    )
+    
     def __init__(self):
-        self.config = config.buy
+        self.configure(config.buy)
+    
+    def configure(self, buy_config=None):
+        """Fija umbrales y montos una vez; volver a llamar si cambia la config"""
+        cfg = self.config = buy_config or self.config
+        self._rsi_overbought = cfg.rsi_overbought
+        self._rsi_oversold = cfg.rsi_oversold
+        self._ma_dip_threshold = cfg.ma_dip_threshold
+        self._weekly_drop_threshold = cfg.weekly_drop_threshold
+        
+        # (multiplicador, monto sugerido) por tipo de señal
+        self._sizing = {}
+        for signal_type in SignalType:
+            multiplier = cfg.multipliers.get(signal_type, 1.0)
+            self._sizing[signal_type] = (multiplier, cfg.base_amount_usd * multiplier)
+        self._series_amounts = np.array([self._sizing[t][1] for t in self.SERIES_TYPES])
+    
+    def evaluate_series(self, price: np.ndarray, ma7: np.ndarray,
+                        rsi: np.ndarray, pct_7d: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Misma regla que evaluate() sobre arrays completos (backtests)
+        
+        Devuelve (códigos en SERIES_TYPES, monto sugerido por vela)
+        """
+        codes = np.select(
+            [
+                rsi > self._rsi_overbought,
+                (price < ma7 * self._ma_dip_threshold) | (pct_7d <= self._weekly_drop_threshold),
+                rsi < self._rsi_oversold,
+            ],
+            [0, 1, 2],
+            default=3,
+        ).astype(np.int8)
+        return codes, self._series_amounts[codes]
     
     def evaluate(self, market_data: MarketData) -> BuySignal:
-        reasons = []
+        rsi_overbought = self._rsi_overbought
+        rsi_oversold = self._rsi_oversold
+        rsi = market_data.rsi
+        price = market_data.price
+        pct_7d = market_data.pct_change_7d
         
         # Check SKIP primero
-        if market_data.rsi > self.config.rsi_overbought:
+        if rsi > rsi_overbought:
             return self._create_signal(
                 SignalType.SKIP,
-                [f"RSI sobrecomprado ({market_data.rsi:.0f} > {self.config.rsi_overbought})"],
+                [f"RSI sobrecomprado ({rsi:.0f} > {rsi_overbought})"],
                 market_data
             )
         
-        # Check TURBO_BUY conditions
-        turbo_reasons = []
-        
-        ma7_threshold = market_data.ma7 * self.config.ma_dip_threshold
-        if market_data.price < ma7_threshold:
-            turbo_reasons.append(
-                f"Precio ${market_data.price:,.0f} < 97% MA7 (${ma7_threshold:,.0f})"
-            )
-        
-        if market_data.pct_change_7d <= self.config.weekly_drop_threshold:
-            turbo_reasons.append(
-                f"Caída semanal fuerte: {market_data.pct_change_7d:.1f}%"
-            )
+        # Check TURBO_BUY conditions (los textos solo se arman si aplica)
+        ma7_threshold = market_data.ma7 * self._ma_dip_threshold
+        ma_dip = price < ma7_threshold
+        weekly_drop = pct_7d <= self._weekly_drop_threshold
         
-        if turbo_reasons:
+        if ma_dip or weekly_drop:
+            turbo_reasons = []
+            if ma_dip:
+                turbo_reasons.append(
+                    f"Precio ${price:,.0f} < 97% MA7 (${ma7_threshold:,.0f})"
+                )
+            if weekly_drop:
+                turbo_reasons.append(f"Caída semanal fuerte: {pct_7d:.1f}%")
             return self._create_signal(
                 SignalType.TURBO_BUY,
                 turbo_reasons,
@@ -77,10 +117,10 @@ class DCABuyStrategy:
             )
         
         # Check EXTRA_BUY
-        if market_data.rsi < self.config.rsi_oversold:
+        if rsi < rsi_oversold:
             return self._create_signal(
                 SignalType.EXTRA_BUY,
-                [f"RSI en sobreventa ({market_data.rsi:.0f} < {self.config.rsi_oversold})"],
+                [f"RSI en sobreventa ({rsi:.0f} < {rsi_oversold})"],
                 market_data
             )
         
@@ -97,11 +137,11 @@ class DCABuyStrategy:
         reasons: list[str], 
         market_data: MarketData
     ) -> BuySignal:
-        multiplier = self.config.multipliers.get(signal_type, 1.0)
+        multiplier, amount = self._sizing[signal_type]
         return BuySignal(
             signal_type=signal_type,
             multiplier=multiplier,
-            suggested_amount=self.config.base_amount_usd * multiplier,
+            suggested_amount=amount,
             reasons=reasons,
             market_data=market_data,
         )
@@ -119,104 +159,87 @@ class DCASellStrategy:
     para detectar tops de mercado
     """
     
+    # Nivel por cantidad de umbrales superados (0..3)
+    _LEVELS = (RiskLevel.SAFE, RiskLevel.WARNING, RiskLevel.DANGER, RiskLevel.CRITICAL)
+    # Puntos de risk score por indicador en cada nivel
+    _LEVEL_POINTS = np.array([0, 10, 25, 40])
+    
     def __init__(self):
         self.config = config.sell
-        self._historical_df: pd.DataFrame = None
+        # Serie 365d sobre la que se calculó el último Pi Cycle
+        self._series = None
+        self._pi_cycle = False
+        
+        cfg = self.config
+        self._names = ("MVRV Z-Score", "NUPL", "RSI (Daily)", "Mayer Multiple", "Fear & Greed")
+        self._thresholds = (
+            (cfg.mvrv_warning, cfg.mvrv_danger, cfg.mvrv_critical),
+            (cfg.nupl_warning, cfg.nupl_danger, cfg.nupl_critical),
+            (cfg.rsi_warning, cfg.rsi_danger, cfg.rsi_critical),
+            (cfg.mayer_warning, cfg.mayer_danger, cfg.mayer_critical),
+            (65, 75, 85),  # Fear & Greed (invertido)
+        )
+        # Columnas warning/danger/critical para comparar todos los indicadores juntos
+        self._cuts = np.array(self._thresholds, dtype=np.float64)
+        # Porcentaje de venta según el nivel más alto alcanzado
+        self._tier_by_level = (
+            0.0,
+            cfg.sell_tiers.get(1, 0.10),
+            cfg.sell_tiers.get(2, 0.15),
+            cfg.sell_tiers[3],
+        )
+        # Con Pi Cycle activo se vende al menos su tramo
+        self._tier_by_level_pi = tuple(
+            max(tier, cfg.sell_tiers["pi_cycle"]) for tier in self._tier_by_level
+        )
     
     def evaluate(self, market_data: MarketData, position: Position) -> SellSignal:
-        # Obtener datos históricos para Pi Cycle
-        self._historical_df = market_service.get_historical_prices(365)
+        # Pi Cycle sobre la misma serie que armó get_full_market_data (precio sin redondear)
+        pi_cycle = self._load_history()
         
         # Evaluar indicadores
-        indicators = self._evaluate_indicators(market_data)
+        indicators, levels = self._evaluate_indicators(market_data)
         
-        # Contar señales por nivel
-        counts = self._count_signals(indicators)
-        
-        # Verificar Pi Cycle
-        pi_cycle = market_service.check_pi_cycle(self._historical_df)
+        # Contar señales por nivel (índice = SAFE, WARNING, DANGER, CRITICAL)
+        counts = np.bincount(levels, minlength=len(self._LEVELS))
         
         # Calcular risk score
         risk_score = self._calculate_risk_score(counts, pi_cycle)
         
         # Generar recomendación
         return self._generate_recommendation(
-            indicators, counts, pi_cycle, risk_score, market_data, position
+            indicators, levels, counts, pi_cycle, risk_score, market_data, position
         )
     
-    def _evaluate_indicators(self, data: MarketData) -> list[Indicator]:
-        """Evalúa todos los indicadores y retorna lista"""
-        indicators = []
-        
-        # MVRV Z-Score
-        if data.mvrv_zscore is not None:
-            indicators.append(self._create_indicator(
-                "MVRV Z-Score", data.mvrv_zscore,
-                self.config.mvrv_warning, self.config.mvrv_danger, self.config.mvrv_critical
-            ))
-        
-        # NUPL
-        if data.nupl is not None:
-            indicators.append(self._create_indicator(
-                "NUPL", data.nupl,
-                self.config.nupl_warning, self.config.nupl_danger, self.config.nupl_critical
-            ))
-        
-        # RSI
-        indicators.append(self._create_indicator(
-            "RSI (Daily)", data.rsi,
-            self.config.rsi_warning, self.config.rsi_danger, self.config.rsi_critical
-        ))
+    def _load_history(self) -> bool:
+        """Pi Cycle sobre la serie 365d; se recalcula solo si la serie cambió"""
+        series = market_service.latest_series(365)
+        if series is not self._series:
+            self._pi_cycle = market_service.check_pi_cycle(series.price)
+            self._series = series
+        return self._pi_cycle
+    
+    def _evaluate_indicators(self, data: MarketData) -> tuple[list[Indicator], np.ndarray]:
+        """Evalúa todos los indicadores; retorna la lista y sus niveles (0..3)"""
+        values = (data.mvrv_zscore, data.nupl, data.rsi, data.mayer_multiple, data.fear_greed)
+        present = np.array([v is not None for v in values])
+        vec = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
         
-        # Mayer Multiple
-        if data.mayer_multiple is not None:
-            indicators.append(self._create_indicator(
-                "Mayer Multiple", data.mayer_multiple,
-                self.config.mayer_warning, self.config.mayer_danger, self.config.mayer_critical
-            ))
+        # Cantidad de umbrales superados por indicador, sin ramas
+        levels = (vec[:, None] >= self._cuts).sum(axis=1)[present]
         
-        # Fear & Greed (invertido)
-        if data.fear_greed is not None:
-            indicators.append(self._create_indicator(
-                "Fear & Greed", data.fear_greed,
-                65, 75, 85
+        indicators = []
+        for idx, level in zip(np.flatnonzero(present), levels.tolist()):
+            warn, danger, critical = self._thresholds[idx]
+            indicators.append(Indicator(
+                name=self._names[idx], value=values[idx], level=self._LEVELS[level],
+                threshold_warning=warn, threshold_danger=danger, threshold_critical=critical
             ))
-        
-        return indicators
-    
-    def _create_indicator(
-        self, name: str, value: float,
-        warn: float, danger: float, critical: float
-    ) -> Indicator:
-        """Crea indicador con nivel calculado"""
-        if value >= critical:
-            level = RiskLevel.CRITICAL
-        elif value >= danger:
-            level = RiskLevel.DANGER
-        elif value >= warn:
-            level = RiskLevel.WARNING
-        else:
-            level = RiskLevel.SAFE
-        
-        return Indicator(
-            name=name, value=value, level=level,
-            threshold_warning=warn, threshold_danger=danger, threshold_critical=critical
-        )
-    
-    def _count_signals(self, indicators: list[Indicator]) -> dict:
-        """Cuenta señales por nivel"""
-        return {
-            "warning": sum(1 for i in indicators if i.level == RiskLevel.WARNING),
-            "danger": sum(1 for i in indicators if i.level == RiskLevel.DANGER),
-            "critical": sum(1 for i in indicators if i.level == RiskLevel.CRITICAL),
-        }
+        return indicators, levels
     
-    def _calculate_risk_score(self, counts: dict, pi_cycle: bool) -> int:
+    def _calculate_risk_score(self, counts: np.ndarray, pi_cycle: bool) -> int:
         """Calcula risk score 0-100"""
-        score = 0
-        score += counts["warning"] * 10
-        score += counts["danger"] * 25
-        score += counts["critical"] * 40
+        score = int(counts @ self._LEVEL_POINTS)
         if pi_cycle:
             score += 30
         return min(score, 100)
@@ -224,7 +247,8 @@ class DCASellStrategy:
     def _generate_recommendation(
         self, 
         indicators: list[Indicator],
-        counts: dict,
+        levels: np.ndarray,
+        counts: np.ndarray,
         pi_cycle: bool,
         risk_score: int,
         market_data: MarketData,
@@ -232,27 +256,27 @@ class DCASellStrategy:
     ) -> SellSignal:
         """Genera recomendación de venta"""
         reasons = []
-        sell_pct = 0.0
+        tiers = self._tier_by_level_pi if pi_cycle else self._tier_by_level
+        sell_pct = tiers[int(levels.max()) if levels.size else 0]
         
         # Pi Cycle es la señal más fuerte
         if pi_cycle:
-            sell_pct = max(sell_pct, self.config.sell_tiers["pi_cycle"])
             reasons.append("🚨 PI CYCLE TOP - Señal histórica de techo de mercado")
         
-        # Indicadores críticos
-        for ind in indicators:
-            if ind.level == RiskLevel.CRITICAL:
-                sell_pct = max(sell_pct, self.config.sell_tiers[3])
+        # Solo se formatean los indicadores fuera de zona segura; un WARNING
+        # se reporta únicamente si es la primera señal (y no hay Pi Cycle)
+        active = np.flatnonzero(levels).tolist()
+        for n, idx in enumerate(active):
+            ind = indicators[idx]
+            if ind.level is RiskLevel.CRITICAL:
                 reasons.append(
                     f"🔴 {ind.name}: {ind.value:.2f} CRÍTICO (>{ind.threshold_critical})"
                 )
-            elif ind.level == RiskLevel.DANGER:
-                sell_pct = max(sell_pct, self.config.sell_tiers.get(2, 0.15))
+            elif ind.level is RiskLevel.DANGER:
                 reasons.append(
                     f"🟠 {ind.name}: {ind.value:.2f} en PELIGRO (>{ind.threshold_danger})"
                 )
-            elif ind.level == RiskLevel.WARNING and sell_pct == 0:
-                sell_pct = self.config.sell_tiers.get(1, 0.10)
+            elif n == 0 and not pi_cycle:
                 reasons.append(
                     f"🟡 {ind.name}: {ind.value:.2f} en WARNING (>{ind.threshold_warning})"
                 )
@@ -262,7 +286,7 @@ class DCASellStrategy:
         sell_usd = sell_btc * market_data.price
         
         # Determinar tipo de señal
-        total_signals = counts["warning"] + counts["danger"] + counts["critical"]
+        total_signals = int(counts[1:].sum())
         
         if total_signals >= self.config.min_signals_to_sell or pi_cycle:
             signal_type = SignalType.SELL
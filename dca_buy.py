@@ -9,18 +9,19 @@ Ejemplo de uso:
 """
 
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 
 from core.config import config, SignalType
 from core.database import BuyRepository
 from core.market import market_service
-from core.notifications import notifier
+from core import notifications
 from core.strategies import StrategyFactory
 
 
 def main(dry_run: bool = False) -> int:
-    print(f"🔄 DCA Buy Optimizer - {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}")
-    print("=" * 60)
+    # Un solo reloj por ejecución: header en UTC, snapshot/señal en hora local
+    run_ts = datetime.now(timezone.utc)
+    print(f"🔄 DCA Buy Optimizer - {run_ts:%Y-%m-%d %H:%M UTC}\n{'=' * 60}")
     
     # Inicializar componentes
     repo = BuyRepository()
@@ -29,36 +30,39 @@ def main(dry_run: bool = False) -> int:
     # Obtener datos de mercado
     print("📡 Obteniendo datos de mercado...")
     try:
-        market_data = market_service.get_full_market_data(for_sell=False)
+        market_data = market_service.get_full_market_data(
+            for_sell=False, timestamp=run_ts.astimezone().replace(tzinfo=None).isoformat()
+        )
     except Exception as e:
         print(f"❌ Error obteniendo datos: {e}")
         return 1
     
-    print(f"   Precio: ${market_data.price:,.2f}")
-    print(f"   RSI: {market_data.rsi}")
-    print(f"   7d: {market_data.pct_change_7d:+.1f}%")
-    
-    # Guardar snapshot de precio
-    repo.save_price_snapshot(market_data)
+    print("\n".join((
+        f"   Precio: ${market_data.price:,.2f}",
+        f"   RSI: {market_data.rsi}",
+        f"   7d: {market_data.pct_change_7d:+.1f}%",
+    )))
     
     # Evaluar estrategia
     signal = strategy.evaluate(market_data)
     
-    print(f"\n🎯 Señal: {signal.signal_type.value}")
-    print(f"   Multiplicador: x{signal.multiplier}")
-    print(f"   Monto: ${signal.suggested_amount:,.2f}")
-    for reason in signal.reasons:
-        print(f"   • {reason}")
+    lines = [
+        f"\n🎯 Señal: {signal.signal_type.value}",
+        f"   Multiplicador: x{signal.multiplier}",
+        f"   Monto: ${signal.suggested_amount:,.2f}",
+    ]
+    lines.extend(f"   • {reason}" for reason in signal.reasons)
+    print("\n".join(lines))
     
-    # Guardar señal
-    signal_id = repo.save_signal(signal)
+    # Guardar snapshot de precio y señal (una sola transacción)
+    signal_id = repo.save_run(market_data, signal)
     print(f"\n💾 Guardado (ID: {signal_id})")
     
     # Enviar notificación
     if dry_run:
         print("📱 Modo dry-run: notificación no enviada")
     elif signal.signal_type != SignalType.SKIP:
-        if notifier.notify_buy_signal(signal):
+        if notifications.notifier.notify_buy_signal(signal):
             repo.mark_notified(signal_id)
             print("📱 Notificación enviada")
         else:
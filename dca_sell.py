@@ -14,17 +14,19 @@ Ejemplo de uso:
 """
 
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 
 from core.config import config, SignalType
 from core.database import SellRepository
 from core.market import market_service
-from core.notifications import notifier
+from core import notifications
 from core.strategies import StrategyFactory
 
 
 def main(dry_run: bool = False, force_notify: bool = False) -> int:
-    print(f"🔄 DCA Sell Optimizer - {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}")
+    # Un solo reloj por ejecución: header en UTC, señal en hora local
+    run_ts = datetime.now(timezone.utc)
+    print(f"🔄 DCA Sell Optimizer - {run_ts:%Y-%m-%d %H:%M UTC}")
     print("=" * 60)
     
     # Inicializar componentes
@@ -39,7 +41,9 @@ def main(dry_run: bool = False, force_notify: bool = False) -> int:
     # Obtener datos de mercado
     print("\n📡 Obteniendo datos de mercado...")
     try:
-        market_data = market_service.get_full_market_data(for_sell=True)
+        market_data = market_service.get_full_market_data(
+            for_sell=True, timestamp=run_ts.astimezone().replace(tzinfo=None).isoformat()
+        )
     except Exception as e:
         print(f"❌ Error obteniendo datos: {e}")
         return 1
@@ -64,9 +68,9 @@ def main(dry_run: bool = False, force_notify: bool = False) -> int:
         print(f"   ≈ ${signal.sell_amount_usd:,.2f}")
     
     print("\n📊 Indicadores:")
+    emoji = notifications.LEVEL_EMOJI
     for ind in signal.indicators:
-        emoji = {"SAFE": "✅", "WARNING": "🟡", "DANGER": "🟠", "CRITICAL": "🔴"}
-        print(f"   {emoji.get(ind.level.value, '❓')} {ind.name}: {ind.value:.2f}")
+        print(f"   {emoji.get(ind.level, '❓')} {ind.name}: {ind.value:.2f}")
     
     # Guardar señal
     signal_id = repo.save_signal(signal)
@@ -74,14 +78,14 @@ def main(dry_run: bool = False, force_notify: bool = False) -> int:
     
     # Enviar notificación
     should_notify = (
-        signal.signal_type in [SignalType.SELL, SignalType.ALERT] 
+        signal.signal_type in (SignalType.SELL, SignalType.ALERT) 
         or force_notify
     )
     
     if dry_run:
         print("📱 Modo dry-run: notificación no enviada")
     elif should_notify:
-        if notifier.notify_sell_signal(signal, position):
+        if notifications.notifier.notify_sell_signal(signal, position):
             repo.mark_notified(signal_id)
             print("📱 Notificación enviada")
         else:
@@ -15,18 +15,32 @@ Uso:
     python dca_utils.py backtest [days]
 """
 
+import sqlite3
 import sys
-from datetime import datetime
-
-import requests
+import threading
+from datetime import datetime, timezone
 
 from core.config import config, SignalType
 from core.database import BuyRepository, SellRepository
-from core.market import market_service
-from core.notifications import notifier
+from core.market import MarketDataService, market_service
 from core.strategies import StrategyFactory
 
 
+_BUY_EMOJI = {
+    "TURBO_BUY": "🚀", "EXTRA_BUY": "📈",
+    "NORMAL_DCA": "✅", "SKIP": "⏸️"
+}
+
+# Emoji por risk score (0-100): <30, 30-49, 50-69, >=70
+_RISK_EMOJI = tuple(
+    "🔴" if r >= 70 else "🟠" if r >= 50 else "🟡" if r >= 30 else "✅" for r in range(101)
+)
+
+# Plantillas de fila precompiladas para los listados de historial
+_BUY_ROW = "\n{} {} | {}{}\n   Precio: ${:,.0f} | Monto: ${:,.0f}".format
+_SELL_ROW = "\n{} {} | {} | Risk: {}/100{}{}\n   Precio: ${:,.0f} | Sugerido: {:.0f}%".format
+
+
 # ============================================================================
 # BUY COMMANDS
 # ============================================================================
@@ -42,19 +56,17 @@ def buy_history(limit: int = 10):
     repo = BuyRepository()
     signals = repo.get_recent_signals(limit)
     
-    print(f"\n{'='*60}")
-    print(f"📊 ÚLTIMAS {limit} SEÑALES DE COMPRA")
-    print(f"{'='*60}")
+    lines = [f"\n{'='*60}", f"📊 ÚLTIMAS {limit} SEÑALES DE COMPRA", f"{'='*60}"]
     
     for s in signals:
-        emoji = {
-            "TURBO_BUY": "🚀", "EXTRA_BUY": "📈",
-            "NORMAL_DCA": "✅", "SKIP": "⏸️"
-        }.get(s["signal_type"], "❓")
+        emoji = _BUY_EMOJI.get(s.signal_type, "❓")
         
-        exec_str = " ✓EXEC" if s.get("executed") else ""
-        print(f"\n{emoji} {s['timestamp'][:16]} | {s['signal_type']}{exec_str}")
-        print(f"   Precio: ${s['price']:,.0f} | Monto: ${s['suggested_amount']:,.0f}")
+        exec_str = " ✓EXEC" if s.executed else ""
+        lines.append(_BUY_ROW(emoji, s.timestamp[:16], s.signal_type, exec_str,
+                              s.price, s.suggested_amount))
+    
+    # Una sola escritura a stdout
+    print("\n".join(lines))
 
 
 # ============================================================================
@@ -69,15 +81,12 @@ def sell_run(dry_run: bool = False, force: bool = False):
 
 def sell_position():
     """Muestra estado de la posición"""
+    # El precio viaja por red mientras se lee la posición
+    price_result = _prefetch_price()
+    
     repo = SellRepository()
     pos = repo.get_or_create_position()
-    
-    # Precio actual
-    try:
-        price_data = market_service.get_current_price()
-        price = price_data["price"]
-    except Exception:
-        price = 0
+    price, _ = price_result()
     
     current_value = pos.remaining_btc * price
     cost_of_remaining = pos.remaining_btc * pos.cost_per_btc
@@ -100,25 +109,19 @@ def sell_position():
 def sell_signals(limit: int = 10):
     """Muestra señales de venta recientes"""
     repo = SellRepository()
+    signals = repo.get_recent_signals(limit)
     
-    with repo.connection() as conn:
-        signals = conn.execute(f"""
-            SELECT timestamp, price, risk_score, signal_type, 
-                   sell_percentage, pi_cycle_triggered, executed
-            FROM sell_signals ORDER BY timestamp DESC LIMIT {limit}
-        """).fetchall()
-    
-    print(f"\n{'='*60}")
-    print(f"📊 ÚLTIMAS {limit} SEÑALES DE VENTA")
-    print(f"{'='*60}")
+    lines = [f"\n{'='*60}", f"📊 ÚLTIMAS {limit} SEÑALES DE VENTA", f"{'='*60}"]
     
     for s in signals:
-        emoji = "🔴" if s[2] >= 70 else ("🟠" if s[2] >= 50 else ("🟡" if s[2] >= 30 else "✅"))
-        pi_str = " 🚨PI" if s[5] else ""
-        exec_str = " ✓EXEC" if s[6] else ""
+        emoji = _RISK_EMOJI[max(0, min(100, s.risk_score))]
+        pi_str = " 🚨PI" if s.pi_cycle_triggered else ""
+        exec_str = " ✓EXEC" if s.executed else ""
         
-        print(f"\n{emoji} {s[0][:16]} | {s[3]} | Risk: {s[2]}/100{pi_str}{exec_str}")
-        print(f"   Precio: ${s[1]:,.0f} | Sugerido: {s[4]*100:.0f}%")
+        lines.append(_SELL_ROW(emoji, s.timestamp[:16], s.signal_type, s.risk_score, pi_str,
+                               exec_str, s.price, s.sell_percentage * 100))
+    
+    print("\n".join(lines))
 
 
 def sell_record(btc: float, price: float, exchange: str = "manual"):
@@ -144,19 +147,62 @@ def sell_reset(total_btc: float, cost_basis: float):
 # DASHBOARD
 # ============================================================================
 
+def _fetch_price() -> tuple[float, float]:
+    try:
+        price_data = market_service.get_current_price(MarketDataService.INTERACTIVE_TIMEOUT)
+        return price_data["price"], price_data["change_24h"]
+    except MarketDataService.FETCH_ERRORS:
+        return 0, 0
+
+
+def _prefetch_price():
+    """Lanza _fetch_price en segundo plano; devuelve la función que espera el resultado"""
+    box = [(0, 0)]
+    
+    def run():
+        box[0] = _fetch_price()
+    
+    # daemon: si la red no responde a tiempo, no retiene la salida del proceso
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    
+    def result() -> tuple[float, float]:
+        thread.join(timeout=sum(MarketDataService.INTERACTIVE_TIMEOUT))
+        return box[0]
+    
+    return result
+
+
 def dashboard():
     """Dashboard combinado buy/sell"""
+    # El precio viaja por red mientras se leen las estadísticas locales
+    price_result = _prefetch_price()
+    
+    # Solo errores de SQLite (DB ausente, esquema viejo); el resto debe verse
+    stats = pos = latest = sell_stats = None
+    buy_error = sell_error = stats_error = None
+    try:
+        stats = BuyRepository().get_signal_stats(100)
+    except sqlite3.Error as e:
+        buy_error = e
+    
     try:
-        price_data = market_service.get_current_price()
-        price = price_data["price"]
-        change = price_data["change_24h"]
-    except Exception:
-        price, change = 0, 0
+        sell_repo = SellRepository()
+        pos, latest = sell_repo.get_position_and_latest_signal()
+    except sqlite3.Error as e:
+        sell_error = e
+    else:
+        try:
+            sell_stats = sell_repo.get_signal_stats()
+        except sqlite3.Error as e:
+            stats_error = e
+    
+    price, change = price_result()
     
     print(f"\n{'='*70}")
     print("🎯 DCA OPTIMIZER - DASHBOARD")
     print(f"{'='*70}")
-    print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
+    print(f"📅 {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}")
     
     if price:
         emoji = "📈" if change > 0 else "📉"
@@ -167,44 +213,44 @@ def dashboard():
     print("📥 SISTEMA DE COMPRA")
     print(f"{'-'*70}")
     
-    try:
-        buy_repo = BuyRepository()
-        signals = buy_repo.get_recent_signals(100)
-        
-        counts = {"TURBO_BUY": 0, "EXTRA_BUY": 0, "NORMAL_DCA": 0, "SKIP": 0}
-        total_invested = 0
-        for s in signals:
-            counts[s["signal_type"]] = counts.get(s["signal_type"], 0) + 1
-            if s["signal_type"] != "SKIP":
-                total_invested += s["suggested_amount"]
-        
-        print(f"   Señales totales: {len(signals)}")
-        print(f"   • Turbo: {counts['TURBO_BUY']} | Extra: {counts['EXTRA_BUY']}")
-        print(f"   • Normal: {counts['NORMAL_DCA']} | Skip: {counts['SKIP']}")
-        print(f"   Total sugerido: ${total_invested:,.2f}")
-    except Exception:
-        print("   ⚠️ Sin datos de compra")
+    if stats is not None:
+        print(f"   Señales totales: {stats.total_signals}")
+        print(f"   • Turbo: {stats.turbo_buys} | Extra: {stats.extra_buys}")
+        print(f"   • Normal: {stats.normal_dcas} | Skip: {stats.skips}")
+        print(f"   Total sugerido: ${stats.total_invested:,.2f}")
+    else:
+        print(f"   ⚠️ Sin datos de compra ({buy_error})")
     
     # Sell stats
     print(f"\n{'-'*70}")
     print("📤 SISTEMA DE VENTA")
     print(f"{'-'*70}")
     
-    try:
-        sell_repo = SellRepository()
-        pos = sell_repo.get_or_create_position()
-        
+    if pos is None:
+        print(f"   ⚠️ Sin datos de venta ({sell_error})")
+    elif pos.total_btc <= 0:
+        print("   ⚠️ Posición sin BTC configurado")
+    else:
         print(f"   Posición: {pos.total_btc:.4f} BTC (${pos.cost_basis:,.0f})")
         print(f"   • Restante: {pos.remaining_btc:.4f} ({pos.remaining_btc/pos.total_btc*100:.1f}%)")
         print(f"   • Vendido: {pos.sold_btc:.4f} ({pos.sold_btc/pos.total_btc*100:.1f}%)")
+        if latest:
+            print(f"   • Última señal: {latest.signal_type} | Risk: {latest.risk_score}/100 ({latest.timestamp[:16]})")
+        if sell_stats is None:
+            print(f"   ⚠️ Sin estadísticas de venta ({stats_error})")
+        else:
+            if sell_stats.total_signals:
+                print(f"   • Señales: {sell_stats.total_signals} (SELL: {sell_stats.sell_signals}) | Risk medio: {sell_stats.avg_risk_score:.0f}/100")
+            # Ventas desde sell_executions: incluye las manuales sin señal asociada
+            if sell_stats.executed_sales:
+                print(f"   • Ventas ejecutadas: {sell_stats.executed_sales} | USD vendidos: ${sell_stats.total_sold_usd:,.2f}")
+                print(f"   • Precio medio de venta: ${sell_stats.avg_sale_price:,.0f} | Beneficio realizado: ${sell_stats.realized_profit:+,.2f}")
         
         if price:
             value = pos.remaining_btc * price
             pnl = value - (pos.remaining_btc * pos.cost_per_btc)
             print(f"\n   Valor actual: ${value:,.2f}")
             print(f"   P&L: ${pnl:+,.2f}")
-    except Exception:
-        print("   ⚠️ Sin datos de venta")
     
     print(f"\n{'-'*70}")
     print("⏰ TIMING ÓPTIMO")
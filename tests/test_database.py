@@ -0,0 +1,43 @@
+"""
+Tests de la conexión compartida entre repositorios
+"""
+
+import pytest
+
+from core.database import BaseRepository, BuyRepository, SellRepository
+
+
+@pytest.fixture(autouse=True)
+def _close_connections():
+    yield
+    BaseRepository.close_all()
+
+
+def test_close_keeps_sibling_repository_usable(tmp_path):
+    db_path = tmp_path / "dca.db"
+    buy_repo = BuyRepository(db_path)
+    sell_repo = SellRepository(db_path)
+    assert buy_repo._conn is sell_repo._conn
+
+    buy_repo.close()
+
+    position = sell_repo.get_or_create_position()
+    assert position.sold_btc == 0
+    assert sell_repo.get_signal_stats().total_signals == 0
+
+
+def test_last_close_releases_connection(tmp_path):
+    db_path = tmp_path / "dca.db"
+    buy_repo = BuyRepository(db_path)
+    sell_repo = SellRepository(db_path)
+
+    buy_repo.close()
+    buy_repo.close()  # cerrar dos veces no descuenta otra referencia
+    assert db_path in BaseRepository._connections
+
+    sell_repo.close()
+    assert db_path not in BaseRepository._connections
+
+    # Un repositorio nuevo abre otra conexión y vuelve a verificar el esquema
+    reopened = SellRepository(db_path)
+    assert reopened.get_or_create_position().sold_btc == 0